@@ -6,6 +6,58 @@ class Settings(BaseSettings):
     retell_api_key: str = Field(default="", description="Retell API key for signature verification")
     google_token_json: str = Field(default="{}", description="Serialized Google OAuth token JSON")
     google_calendar_id: str = Field(default="primary", description="Target Google Calendar ID")
+    calendar_search_window_days: int = Field(
+        default=90, description="How far ahead (in days) to search for a caller's existing event"
+    )
+    callback_db_path: str = Field(default="callbacks.db", description="SQLite file for pending callbacks")
+    callback_action: str = Field(
+        default="outbound_stub", description="What to do when a callback is due: outbound_stub or calendar_hold"
+    )
+    callback_default_delay_minutes: int = Field(
+        default=60, description="Delay used when the caller did not give a callback time"
+    )
+    callback_tick_seconds: float = Field(default=1.0, description="Callback timer wheel resolution")
+    outcome_min_confidence: float = Field(
+        default=0.5, description="Min transcript classifier confidence to trust its outcome"
+    )
+    admission_max_inflight_requests: int = Field(
+        default=32, description="Max webhook requests processed at once"
+    )
+    admission_max_inflight_bytes: int = Field(
+        default=16 * 1024 * 1024, description="Max total webhook payload bytes held at once"
+    )
+    admission_low_priority_share: float = Field(
+        default=0.25, description="Fraction of the budget call_started/call_ended may use"
+    )
+    admission_retry_after_seconds: int = Field(
+        default=5, description="Retry-After sent with 503 when over budget"
+    )
+    profiling_enabled: bool = Field(default=False, description="Allow webhook request profiling")
+    profiling_token: str = Field(
+        default="", description="Requests with a matching X-Profile-Token header are profiled"
+    )
+    profiling_sample_rate: float = Field(default=0.0, description="Fraction of requests to profile")
+    profiling_slow_threshold_ms: float = Field(
+        default=0.0, description="Keep profiles of requests slower than this (0 = off)"
+    )
+    profiling_max_threshold_profiles: int = Field(
+        default=4, description="Max requests sampled at once for the slow threshold"
+    )
+    profiling_interval_ms: float = Field(default=5.0, description="Stack sampling interval")
+    profiling_dir: str = Field(default="profiles", description="Where request profiles are written")
+    profiling_max_profiles: int = Field(default=200, description="Profiles kept before rotating")
+    webhook_processing: str = Field(
+        default="inline", description="inline: process in the web process; queue: hand off to app.worker"
+    )
+    job_queue_backend: str = Field(default="sqlite", description="Job queue backend: sqlite or redis")
+    job_queue_path: str = Field(default="jobs.db", description="SQLite job queue file")
+    job_queue_url: str = Field(default="redis://localhost:6379/0", description="Redis job queue URL")
+    job_visibility_timeout_seconds: float = Field(
+        default=120.0, description="How long a leased job stays invisible without a heartbeat"
+    )
+    job_max_attempts: int = Field(default=5, description="Attempts before a job is dead-lettered")
+    job_retry_delay_seconds: float = Field(default=30.0, description="Base delay before retrying a failed job")
+    worker_poll_interval_seconds: float = Field(default=1.0, description="Worker sleep when the queue is empty")
     environment: str = Field(default="production")
     port: int = Field(default=8000)
 
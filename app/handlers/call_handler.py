@@ -0,0 +1,56 @@
+import logging
+from typing import Optional
+
+from app.handlers.callback_handler import handle_callback_requested
+from app.handlers.meeting_handler import (
+    handle_meeting_booked,
+    handle_meeting_cancelled,
+    handle_meeting_rescheduled,
+)
+from app.models import CallData, CallOutcome
+from app.services.call_parser import (
+    parse_call_outcome,
+    extract_callback_details,
+    extract_meeting_details,
+    extract_cancel_details,
+)
+from app.services.profiling import stage
+
+logger = logging.getLogger(__name__)
+
+
+async def handle_call_analyzed(call: CallData, outcome: Optional[CallOutcome] = None) -> None:
+    """Route an analyzed call to the handler for its outcome, parsing it if not given."""
+    if outcome is None:
+        with stage("parse_outcome"):
+            outcome = parse_call_outcome(call)
+    logger.info(f"Call outcome: {outcome.value} for {call.call_id}")
+
+    if outcome == CallOutcome.MEETING_BOOKED:
+        meeting = extract_meeting_details(call)
+        if meeting:
+            await handle_meeting_booked(meeting)
+        else:
+            logger.error(f"Could not extract meeting details from call {call.call_id}")
+
+    elif outcome == CallOutcome.MEETING_CANCELLED:
+        cancel = extract_cancel_details(call)
+        if cancel:
+            await handle_meeting_cancelled(cancel)
+        else:
+            logger.error(f"Could not extract cancel details from call {call.call_id}")
+
+    elif outcome == CallOutcome.MEETING_RESCHEDULED:
+        cancel = extract_cancel_details(call)
+        meeting = extract_meeting_details(call)
+        if cancel and meeting:
+            await handle_meeting_rescheduled(cancel, meeting)
+        else:
+            logger.error(f"Could not extract reschedule details from call {call.call_id}")
+
+    elif outcome == CallOutcome.CALLBACK_REQUESTED:
+        callback = extract_callback_details(call)
+        if callback:
+            await handle_callback_requested(callback)
+        else:
+            logger.error(f"Could not extract callback details from call {call.call_id}")
@@ -0,0 +1,50 @@
+import asyncio
+import logging
+
+from app.models import CallbackDetails
+from app.services.callback_scheduler import CallbackAction, callback_scheduler
+from app.services.google_calendar import create_callback_hold
+
+logger = logging.getLogger(__name__)
+
+
+async def handle_callback_requested(callback: CallbackDetails) -> None:
+    """Persist the callback request and arm its timer."""
+    logger.info(
+        f"Scheduling callback for {callback.caller_name} "
+        f"({callback.caller_phone}) at {callback.due_at.isoformat()}"
+    )
+    await callback_scheduler.schedule(callback)
+
+
+async def outbound_call_stub(callback: CallbackDetails) -> None:
+    """Local stand-in for an outbound-call trigger: logs the call that would be placed."""
+    logger.info(
+        f"[outbound stub] Would call {callback.caller_name} at {callback.caller_phone} "
+        f"(requested on call {callback.call_id})"
+    )
+
+
+async def calendar_hold(callback: CallbackDetails) -> None:
+    """Put a hold on the calendar so someone returns the call."""
+    event = await asyncio.to_thread(create_callback_hold, callback)
+    if event.get("status") == "cancelled":
+        logger.warning(f"Callback hold for call {callback.call_id} was deleted; not recreating it")
+    else:
+        logger.info(f"Callback hold created: {event.get('htmlLink', 'no link')}")
+
+
+CALLBACK_ACTIONS: dict[str, CallbackAction] = {
+    "outbound_stub": outbound_call_stub,
+    "calendar_hold": calendar_hold,
+}
+
+
+def get_callback_action(name: str) -> CallbackAction:
+    """Look up a configured callback action by name."""
+    try:
+        return CALLBACK_ACTIONS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown callback action '{name}', expected one of {sorted(CALLBACK_ACTIONS)}"
+        ) from None
@@ -1,10 +1,15 @@
+import asyncio
 import logging
+from datetime import datetime
+from typing import Optional
 
 from app.models import CancelDetails, MeetingDetails
 from app.services.google_calendar import (
     create_calendar_event,
     delete_calendar_event,
+    event_id_for_call,
     find_event_by_caller,
+    has_started,
 )
 
 logger = logging.getLogger(__name__)
@@ -17,8 +22,14 @@ async def handle_meeting_booked(meeting: MeetingDetails) -> None:
         f"on {meeting.date_str} at {meeting.time_str}"
     )
     try:
-        event = create_calendar_event(meeting)
-        logger.info(f"Calendar event created: {event.get('htmlLink', 'no link')}")
+        event = await asyncio.to_thread(create_calendar_event, meeting)
+        if event.get("status") == "cancelled":
+            logger.warning(
+                f"Meeting for call {meeting.call_id} was booked before and since deleted; "
+                f"nothing booked"
+            )
+        else:
+            logger.info(f"Calendar event created: {event.get('htmlLink', 'no link')}")
     except Exception as e:
         logger.error(
             f"Failed to create calendar event for call {meeting.call_id}: {e}",
@@ -27,13 +38,27 @@ async def handle_meeting_booked(meeting: MeetingDetails) -> None:
         raise
 
 
-async def handle_meeting_cancelled(details: CancelDetails) -> None:
-    """Find and delete the caller's existing calendar event."""
+async def handle_meeting_cancelled(
+    details: CancelDetails, as_of: Optional[datetime] = None
+) -> None:
+    """Find and delete the caller's existing calendar event.
+
+    ``as_of`` is the time of the cancel call when replaying an older one; the
+    event it referred to is looked up as of then, and left alone if it has
+    already taken place.
+    """
     logger.info(f"Cancelling meeting for {details.caller_name}")
     try:
-        event = find_event_by_caller(details.caller_name, details.caller_phone)
-        if event:
-            delete_calendar_event(event["id"])
+        event = await asyncio.to_thread(
+            find_event_by_caller, details.caller_name, details.caller_phone, as_of
+        )
+        if event and as_of and has_started(event):
+            logger.info(
+                f"Meeting for call {details.call_id} already took place, nothing to cancel: "
+                f"{event.get('summary')}"
+            )
+        elif event:
+            await asyncio.to_thread(delete_calendar_event, event["id"])
             logger.info(
                 f"Meeting cancelled for {details.caller_name}: {event.get('summary')}"
             )
@@ -51,18 +76,28 @@ async def handle_meeting_cancelled(details: CancelDetails) -> None:
 
 
 async def handle_meeting_rescheduled(
-    cancel: CancelDetails, new_meeting: MeetingDetails
+    cancel: CancelDetails, new_meeting: MeetingDetails, as_of: Optional[datetime] = None
 ) -> None:
-    """Delete the old event and create a new one at the updated time."""
+    """Delete the old event and create a new one at the updated time.
+
+    ``as_of`` works as in handle_meeting_cancelled.
+    """
     logger.info(
         f"Rescheduling meeting for {cancel.caller_name} "
         f"to {new_meeting.date_str} at {new_meeting.time_str}"
     )
     try:
         # Delete the old event
-        event = find_event_by_caller(cancel.caller_name, cancel.caller_phone)
-        if event:
-            delete_calendar_event(event["id"])
+        event = await asyncio.to_thread(
+            find_event_by_caller, cancel.caller_name, cancel.caller_phone, as_of
+        )
+        if event and event["id"] == event_id_for_call(new_meeting.call_id):
+            # A retry of this same reschedule: the "old" event is the one we created
+            logger.info(f"Reschedule for call {cancel.call_id} was already applied")
+        elif event and as_of and has_started(event):
+            logger.info(f"Old event already took place, leaving it: {event.get('summary')}")
+        elif event:
+            await asyncio.to_thread(delete_calendar_event, event["id"])
             logger.info(f"Old event deleted: {event.get('summary')}")
         else:
             logger.warning(
@@ -71,10 +106,16 @@ async def handle_meeting_rescheduled(
             )
 
         # Create the new event
-        new_event = create_calendar_event(new_meeting)
-        logger.info(
-            f"Rescheduled event created: {new_event.get('htmlLink', 'no link')}"
-        )
+        new_event = await asyncio.to_thread(create_calendar_event, new_meeting)
+        if new_event.get("status") == "cancelled":
+            logger.warning(
+                f"Rescheduled meeting for call {new_meeting.call_id} was created before "
+                f"and since deleted; nothing booked"
+            )
+        else:
+            logger.info(
+                f"Rescheduled event created: {new_event.get('htmlLink', 'no link')}"
+            )
     except Exception as e:
         logger.error(
             f"Failed to reschedule meeting for call {cancel.call_id}: {e}",
@@ -1,18 +1,36 @@
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
+from app.config import settings
+from app.handlers.callback_handler import get_callback_action
 from app.routers.retell_webhook import router as retell_router
+from app.services.admission import admission
+from app.services.callback_scheduler import callback_scheduler
 
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s %(levelname)s %(name)s: %(message)s",
 )
 
-app = FastAPI(title="Invisible Arts Post-Call Processor", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await callback_scheduler.start(get_callback_action(settings.callback_action))
+    yield
+    await callback_scheduler.stop()
+
+
+app = FastAPI(title="Invisible Arts Post-Call Processor", version="1.0.0", lifespan=lifespan)
 app.include_router(retell_router)
 
 
 @app.get("/health")
 async def health_check():
-    return {"status": "ok", "service": "post-call-processor"}
+    return {
+        "status": "ok",
+        "service": "post-call-processor",
+        "pending_callbacks": callback_scheduler.pending_count,
+        "admission": admission.stats(),
+    }
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from pydantic import BaseModel
 from typing import Optional, Any
 from enum import Enum
@@ -78,3 +80,12 @@ class CancelDetails(BaseModel):
     caller_phone: str
     call_summary: Optional[str] = None
     call_id: str
+
+
+class CallbackDetails(BaseModel):
+    """A requested callback and when it is due."""
+    caller_name: str
+    caller_phone: str
+    due_at: datetime       # timezone-aware
+    call_summary: Optional[str] = None
+    call_id: str
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import logging
 
@@ -6,32 +7,122 @@ from fastapi.responses import JSONResponse
 from retell import Retell
 
 from app.config import settings
-from app.models import WebhookPayload, WebhookEventType
-from app.models import CallOutcome
-from app.services.call_parser import parse_call_outcome, extract_meeting_details, extract_cancel_details
-from app.handlers.meeting_handler import handle_meeting_booked, handle_meeting_cancelled, handle_meeting_rescheduled
+from app.models import CallOutcome, WebhookPayload, WebhookEventType
+from app.services.admission import (
+    SNIFF_BYTES,
+    BudgetExceeded,
+    Priority,
+    Ticket,
+    admission,
+    sniff_event,
+)
+from app.services.call_parser import parse_call_outcome
+from app.services.job_queue import get_job_queue
+from app.services.profiling import annotate, profile_request, stage
+from app.handlers.call_handler import handle_call_analyzed
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# call_analyzed carries the work that matters; the others are informational
+EVENT_PRIORITIES = {
+    WebhookEventType.CALL_ANALYZED.value: Priority.HIGH,
+    WebhookEventType.CALL_STARTED.value: Priority.LOW,
+    WebhookEventType.CALL_ENDED.value: Priority.LOW,
+}
+
+
+def _shed(reason: str) -> JSONResponse:
+    admission.shed_count += 1
+    logger.warning(f"Shedding webhook ({reason}): {admission.stats()}")
+    return JSONResponse(
+        status_code=503,
+        content={"message": "Overloaded, retry later"},
+        headers={"Retry-After": str(settings.admission_retry_after_seconds)},
+    )
+
+
+def _too_large(reason: str) -> JSONResponse:
+    logger.warning(f"Rejecting webhook ({reason})")
+    return JSONResponse(status_code=413, content={"message": "Payload too large"})
+
 
 @router.post("/webhook/retell")
-async def handle_webhook(request: Request):
-    post_data = await request.json()
+async def handle_webhook(request: Request) -> JSONResponse:
+    header = request.headers.get("content-length")
+    if header is not None and not (header.isascii() and header.isdigit()):
+        return JSONResponse(status_code=400, content={"message": "Invalid Content-Length"})
+
+    # Reject before reading the body when its declared size can never fit
+    if header is not None and int(header) > admission.max_bytes:
+        return _too_large(f"Content-Length {header} over the byte limit")
+
+    ticket = admission.admit()
+    if ticket is None:
+        return _shed("too many requests in flight")
+    try:
+        try:
+            body = await _read_body(request, ticket)
+        except BudgetExceeded as e:
+            return _too_large(str(e)) if e.too_large else _shed(str(e))
+
+        # Profile admitted work only, so shed requests cost no sampler thread
+        with profile_request(request.headers, label="webhook"):
+            return await _process_webhook(request, body)
+    finally:
+        ticket.release()
+
+
+async def _read_body(request: Request, ticket: Ticket) -> bytes:
+    """Read the body, reserving budget for each chunk as it arrives.
+
+    The event type is sniffed from the first SNIFF_BYTES, and the request
+    is held to its priority's limits from then on. Raises BudgetExceeded
+    as soon as the body no longer fits, so an oversized or chunked upload
+    is never buffered past the budget.
+    """
+    chunks = []
+    size = 0
+    prioritized = False
+    async for chunk in request.stream():
+        ticket.add_bytes(len(chunk))
+        chunks.append(chunk)
+        size += len(chunk)
+        if not prioritized and size >= SNIFF_BYTES:
+            _prioritize(ticket, b"".join(chunks))
+            prioritized = True
+    body = b"".join(chunks)
+    if not prioritized:
+        _prioritize(ticket, body)
+    return body
+
+
+def _prioritize(ticket: Ticket, head: bytes) -> None:
+    event = sniff_event(head)
+    # Unrecognised payloads get the benefit of the doubt rather than being shed
+    ticket.set_priority(EVENT_PRIORITIES.get(event, Priority.HIGH))
+
+
+async def _process_webhook(request: Request, body: bytes) -> JSONResponse:
+    with stage("json_decode"):
+        post_data = json.loads(body)
 
     # Verify signature in production
     if settings.environment != "development":
-        retell = Retell(api_key=settings.retell_api_key)
-        valid_signature = retell.verify(
-            json.dumps(post_data, separators=(",", ":"), ensure_ascii=False),
-            api_key=settings.retell_api_key,
-            signature=str(request.headers.get("x-retell-signature", "")),
-        )
+        with stage("verify_signature"):
+            retell = Retell(api_key=settings.retell_api_key)
+            valid_signature = retell.verify(
+                json.dumps(post_data, separators=(",", ":"), ensure_ascii=False),
+                api_key=settings.retell_api_key,
+                signature=str(request.headers.get("x-retell-signature", "")),
+            )
         if not valid_signature:
             logger.warning("Invalid webhook signature received")
             return JSONResponse(status_code=401, content={"message": "Unauthorized"})
 
-    payload = WebhookPayload(**post_data)
+    with stage("validate_payload"):
+        payload = WebhookPayload(**post_data)
+    annotate(f"{payload.call.call_id}_{payload.event.value}")
 
     if payload.event == WebhookEventType.CALL_STARTED:
         logger.info(f"Call started: {payload.call.call_id}")
@@ -41,29 +132,24 @@ async def handle_webhook(request: Request):
 
     elif payload.event == WebhookEventType.CALL_ANALYZED:
         logger.info(f"Call analyzed: {payload.call.call_id}")
-        outcome = parse_call_outcome(payload.call)
-        logger.info(f"Call outcome: {outcome.value} for {payload.call.call_id}")
-
-        if outcome == CallOutcome.MEETING_BOOKED:
-            meeting = extract_meeting_details(payload.call)
-            if meeting:
-                await handle_meeting_booked(meeting)
-            else:
-                logger.error(f"Could not extract meeting details from call {payload.call.call_id}")
-
-        elif outcome == CallOutcome.MEETING_CANCELLED:
-            cancel = extract_cancel_details(payload.call)
-            if cancel:
-                await handle_meeting_cancelled(cancel)
-            else:
-                logger.error(f"Could not extract cancel details from call {payload.call.call_id}")
-
-        elif outcome == CallOutcome.MEETING_RESCHEDULED:
-            cancel = extract_cancel_details(payload.call)
-            meeting = extract_meeting_details(payload.call)
-            if cancel and meeting:
-                await handle_meeting_rescheduled(cancel, meeting)
-            else:
-                logger.error(f"Could not extract reschedule details from call {payload.call.call_id}")
+        with stage("parse_outcome"):
+            outcome = parse_call_outcome(payload.call)
+        # Callbacks are always scheduled here: the scheduler that fires them
+        # runs in this process, and its store is not shared with workers
+        if (
+            settings.webhook_processing == "queue"
+            and outcome != CallOutcome.CALLBACK_REQUESTED
+        ):
+            queued = await asyncio.to_thread(
+                get_job_queue().enqueue,
+                f"{payload.call.call_id}:{payload.event.value}",
+                post_data,
+            )
+            logger.info(
+                f"Call {payload.call.call_id} "
+                f"{'queued for a worker' if queued else 'already queued, ignoring retry'}"
+            )
+        else:
+            await handle_call_analyzed(payload.call, outcome)
 
     return JSONResponse(status_code=200, content={"received": True})
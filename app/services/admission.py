@@ -0,0 +1,130 @@
+import re
+from enum import IntEnum
+from typing import Optional
+
+from app.config import settings
+
+_EVENT_PATTERN = re.compile(rb'"event"\s*:\s*"([a-z_]+)"')
+# sniff_event only looks this far into the body
+SNIFF_BYTES = 4096
+
+
+class Priority(IntEnum):
+    HIGH = 0
+    LOW = 1
+
+
+class BudgetExceeded(Exception):
+    """A request does not fit the in-flight budget.
+
+    ``too_large`` is set when the body alone is over its class's byte
+    limit, so retrying it can never succeed.
+    """
+
+    def __init__(self, reason: str, too_large: bool = False):
+        super().__init__(reason)
+        self.too_large = too_large
+
+
+class AdmissionController:
+    """Bounded in-flight budget for webhook work, by request count and payload bytes.
+
+    High-priority work may use the whole budget. Low-priority work may only
+    use ``low_priority_share`` of it, which keeps headroom free for
+    high-priority requests during a spike. Everything runs on the event
+    loop, so check-and-reserve needs no lock.
+    """
+
+    def __init__(self, max_requests: int, max_bytes: int, low_priority_share: float):
+        self.max_requests = max_requests
+        self.max_bytes = max_bytes
+        self.low_priority_share = low_priority_share
+        self.inflight_requests = 0
+        self.inflight_bytes = 0
+        self.shed_count = 0
+
+    def _limits(self, priority: Priority) -> tuple[int, int]:
+        if priority == Priority.HIGH:
+            return self.max_requests, self.max_bytes
+        return (
+            max(1, int(self.max_requests * self.low_priority_share)),
+            int(self.max_bytes * self.low_priority_share),
+        )
+
+    def admit(self) -> Optional["Ticket"]:
+        """Reserve a request slot before the body is read, or None if there is none."""
+        if self.inflight_requests >= self.max_requests:
+            return None
+        self.inflight_requests += 1
+        return Ticket(self)
+
+    def stats(self) -> dict:
+        return {
+            "inflight_requests": self.inflight_requests,
+            "inflight_bytes": self.inflight_bytes,
+            "shed": self.shed_count,
+        }
+
+
+class Ticket:
+    """One admitted request's share of the budget: its slot plus the bytes read so far.
+
+    A request starts out high priority, since its event type is unknown
+    until the body has been sniffed. Bytes are reserved chunk by chunk as
+    the body streams in, and everything is returned by ``release``.
+    """
+
+    def __init__(self, controller: AdmissionController):
+        self._controller = controller
+        self.priority = Priority.HIGH
+        self.nbytes = 0
+
+    def add_bytes(self, nbytes: int) -> None:
+        """Reserve bytes for the next chunk of the body. Raises BudgetExceeded if they do not fit."""
+        controller = self._controller
+        _, max_bytes = controller._limits(self.priority)
+        if self.nbytes + nbytes > max_bytes:
+            raise BudgetExceeded(
+                f"body over the {self.priority.name.lower()}-priority limit of {max_bytes} bytes",
+                too_large=True,
+            )
+        if controller.inflight_bytes + nbytes > max_bytes:
+            raise BudgetExceeded("byte budget exhausted")
+        controller.inflight_bytes += nbytes
+        self.nbytes += nbytes
+
+    def set_priority(self, priority: Priority) -> None:
+        """Apply the request's real priority. Raises BudgetExceeded if it no longer fits."""
+        self.priority = priority
+        controller = self._controller
+        max_requests, max_bytes = controller._limits(priority)
+        if self.nbytes > max_bytes:
+            raise BudgetExceeded(
+                f"body over the {priority.name.lower()}-priority limit of {max_bytes} bytes",
+                too_large=True,
+            )
+        # In-flight totals already include this request
+        if controller.inflight_requests > max_requests or controller.inflight_bytes > max_bytes:
+            raise BudgetExceeded(f"over budget for {priority.name.lower()}-priority work")
+
+    def release(self) -> None:
+        self._controller.inflight_requests -= 1
+        self._controller.inflight_bytes -= self.nbytes
+        self.nbytes = 0
+
+
+def sniff_event(body: bytes) -> str:
+    """Read the top-level event type without parsing the whole payload.
+
+    Retell puts ``event`` before ``call``, so the first match is the
+    top-level one. Returns "" when no event field is found.
+    """
+    match = _EVENT_PATTERN.search(body, 0, SNIFF_BYTES)
+    return match.group(1).decode() if match else ""
+
+
+admission = AdmissionController(
+    max_requests=settings.admission_max_inflight_requests,
+    max_bytes=settings.admission_max_inflight_bytes,
+    low_priority_share=settings.admission_low_priority_share,
+)
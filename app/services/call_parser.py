@@ -1,9 +1,21 @@
 import json
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from typing import Optional
-
-from app.models import CallData, CallOutcome, CancelDetails, MeetingDetails, MeetingType
+from zoneinfo import ZoneInfo
+
+from app.config import settings
+from app.models import (
+    CallbackDetails,
+    CallData,
+    CallOutcome,
+    CancelDetails,
+    MeetingDetails,
+    MeetingType,
+)
+from app.services.google_calendar import HST_TIMEZONE
+from app.services.outcome_classifier import classify_outcome
+from app.services.profiling import stage
 
 logger = logging.getLogger(__name__)
 
@@ -18,14 +30,15 @@ def parse_call_outcome(call: CallData) -> CallOutcome:
         except ValueError:
             logger.warning(f"Unknown call_outcome value: {outcome_str}")
 
-    # Fallback: check if check_available_dates tool was called (implies booking intent)
-    if call.transcript_with_tool_calls:
-        for item in call.transcript_with_tool_calls:
-            if (
-                item.get("role") == "tool_call_invocation"
-                and item.get("name") == "check_available_dates"
-            ):
-                return CallOutcome.MEETING_BOOKED
+    # Fallback: classify from transcript phrases and tool calls
+    with stage("classify_transcript"):
+        classified = classify_outcome(call)
+    if classified.outcome and classified.confidence >= settings.outcome_min_confidence:
+        logger.info(
+            f"Classified call {call.call_id} from transcript as {classified.outcome.value} "
+            f"(confidence {classified.confidence})"
+        )
+        return classified.outcome
 
     # Default
     if call.call_analysis and call.call_analysis.call_successful:
@@ -58,7 +71,8 @@ def extract_meeting_details(call: CallData) -> Optional[MeetingDetails]:
 
     # Parse the datetime string
     try:
-        dt = _parse_flexible_datetime(meeting_datetime_str)
+        with stage("parse_datetime"):
+            dt = _parse_flexible_datetime(meeting_datetime_str)
         date_str = dt.strftime("%Y-%m-%d")
         time_str = dt.strftime("%H:%M")
     except ValueError as e:
@@ -106,6 +120,45 @@ def extract_cancel_details(call: CallData) -> Optional[CancelDetails]:
     )
 
 
+def extract_callback_details(call: CallData) -> Optional[CallbackDetails]:
+    """Extract who to call back and when, defaulting to a fixed delay from now."""
+    cad = {}
+    if call.call_analysis and call.call_analysis.custom_analysis_data:
+        cad = call.call_analysis.custom_analysis_data
+
+    caller_name = cad.get("caller_name") or "Unknown Caller"
+    caller_phone = call.from_number or cad.get("caller_phone") or "Unknown"
+
+    if caller_phone == "Unknown":
+        logger.error(f"No phone number to call back for call {call.call_id}")
+        return None
+
+    now = datetime.now(timezone.utc)
+    due_at = now + timedelta(minutes=settings.callback_default_delay_minutes)
+
+    callback_datetime_str = cad.get("callback_datetime", "")
+    if callback_datetime_str:
+        try:
+            # Callers give local (HST) times
+            requested = _parse_flexible_datetime(callback_datetime_str).replace(
+                tzinfo=ZoneInfo(HST_TIMEZONE)
+            )
+            due_at = max(requested, now)
+        except ValueError as e:
+            logger.warning(
+                f"Could not parse callback datetime '{callback_datetime_str}', "
+                f"using default delay: {e}"
+            )
+
+    return CallbackDetails(
+        caller_name=caller_name,
+        caller_phone=caller_phone,
+        due_at=due_at,
+        call_summary=call.call_analysis.call_summary if call.call_analysis else None,
+        call_id=call.call_id,
+    )
+
+
 def _extract_datetime_from_tool_calls(transcript_with_tool_calls: list[dict]) -> str:
     """Parse tool call invocations to find the selected meeting time."""
     for item in transcript_with_tool_calls:
@@ -0,0 +1,210 @@
+import asyncio
+import logging
+import sqlite3
+import time
+from contextlib import closing
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+
+from app.config import settings
+from app.models import CallbackDetails
+from app.services.timer_wheel import TimerWheel
+
+logger = logging.getLogger(__name__)
+
+CallbackAction = Callable[[CallbackDetails], Awaitable[None]]
+
+MAX_ATTEMPTS = 3
+RETRY_DELAY_SECONDS = 300
+# How often to pick up callbacks persisted by other processes on this host
+# (e.g. tools/backfill.py)
+SYNC_INTERVAL_SECONDS = 5.0
+
+
+class CallbackStore:
+    """SQLite persistence for requested callbacks, so pending timers survive restarts.
+
+    Calls block on disk and on other processes' write locks, so the
+    scheduler runs them in a worker thread.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        if not self._initialized:
+            # WAL lets the web process keep reading while another process writes
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS callbacks (
+                        call_id TEXT PRIMARY KEY,
+                        due_at REAL NOT NULL,
+                        details TEXT NOT NULL,
+                        status TEXT NOT NULL DEFAULT 'pending',
+                        attempts INTEGER NOT NULL DEFAULT 0
+                    )
+                    """
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS callbacks_status ON callbacks (status)"
+                )
+            self._initialized = True
+        return conn
+
+    def add(self, callback: CallbackDetails) -> bool:
+        """Persist a new pending callback. Returns False if the call already has one."""
+        with closing(self._connect()) as conn, conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO callbacks (call_id, due_at, details) VALUES (?, ?, ?)",
+                (callback.call_id, callback.due_at.timestamp(), callback.model_dump_json()),
+            )
+            return cursor.rowcount == 1
+
+    def get(self, call_id: str) -> Optional[tuple[CallbackDetails, int]]:
+        """Return a pending callback and its attempt count, or None if not pending."""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT details, attempts FROM callbacks WHERE call_id = ? AND status = 'pending'",
+                (call_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return CallbackDetails.model_validate_json(row[0]), row[1]
+
+    def pending(self, after_rowid: int = 0) -> list[tuple[int, str, float]]:
+        """Pending (rowid, call_id, due_at) rows added after ``after_rowid``."""
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT rowid, call_id, due_at FROM callbacks "
+                "WHERE status = 'pending' AND rowid > ? ORDER BY rowid",
+                (after_rowid,),
+            ).fetchall()
+
+    def set_status(self, call_id: str, status: str) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "UPDATE callbacks SET status = ? WHERE call_id = ?", (status, call_id)
+            )
+
+    def retry_at(self, call_id: str, due_at: float) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "UPDATE callbacks SET due_at = ?, attempts = attempts + 1 WHERE call_id = ?",
+                (due_at, call_id),
+            )
+
+
+class CallbackScheduler:
+    """Fires persisted callbacks into an action when they come due.
+
+    Pending callbacks live in a hierarchical timer wheel, so each tick costs
+    O(1) regardless of how many callbacks are waiting. On start, every
+    pending row in the store is loaded back into the wheel; overdue ones
+    fire on the first tick. Rows added by other processes sharing the store
+    are picked up every few seconds.
+    """
+
+    def __init__(self, store: CallbackStore, tick_seconds: float = 1.0):
+        self.store = store
+        self.tick_seconds = tick_seconds
+        self._wheel = TimerWheel(tick_seconds=tick_seconds)
+        self._action: Optional[CallbackAction] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_rowid = 0
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._wheel)
+
+    async def start(self, action: CallbackAction) -> None:
+        self._action = action
+        self._wheel = TimerWheel(tick_seconds=self.tick_seconds)
+        self._last_rowid = 0
+        await self._sync()
+        logger.info(f"Callback scheduler started with {len(self._wheel)} pending callbacks")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def schedule(self, callback: CallbackDetails) -> bool:
+        """Persist and arm a callback. Duplicate requests for the same call are ignored."""
+        if not await asyncio.to_thread(self.store.add, callback):
+            logger.info(f"Callback for call {callback.call_id} already scheduled")
+            return False
+        self._wheel.schedule(callback.call_id, callback.due_at.timestamp())
+        return True
+
+    async def _sync(self) -> None:
+        rows = await asyncio.to_thread(self.store.pending, self._last_rowid)
+        for rowid, call_id, due_at in rows:
+            if call_id not in self._wheel:
+                self._wheel.schedule(call_id, due_at)
+            self._last_rowid = rowid
+
+    async def _run(self) -> None:
+        next_sync = time.monotonic() + SYNC_INTERVAL_SECONDS
+        while True:
+            await asyncio.sleep(self.tick_seconds)
+            if time.monotonic() >= next_sync:
+                next_sync = time.monotonic() + SYNC_INTERVAL_SECONDS
+                try:
+                    await self._sync()
+                except Exception as e:
+                    # Rows missed here are picked up by the next sync
+                    logger.error(f"Callback store sync failed: {e}", exc_info=True)
+            for call_id in self._wheel.advance(time.time()):
+                try:
+                    await self._fire(call_id)
+                except Exception as e:
+                    # Most likely the store is locked by another process; try again later
+                    retry_at = time.time() + RETRY_DELAY_SECONDS
+                    self._wheel.schedule(call_id, retry_at)
+                    logger.error(
+                        f"Callback for call {call_id} could not be processed, retrying at "
+                        f"{datetime.fromtimestamp(retry_at).isoformat()}: {e}",
+                        exc_info=True,
+                    )
+
+    async def _fire(self, call_id: str) -> None:
+        entry = await asyncio.to_thread(self.store.get, call_id)
+        if entry is None:
+            return
+        callback, attempts = entry
+        try:
+            await self._action(callback)
+        except Exception as e:
+            if attempts + 1 >= MAX_ATTEMPTS:
+                await asyncio.to_thread(self.store.set_status, call_id, "failed")
+                logger.error(
+                    f"Callback for call {call_id} failed after {MAX_ATTEMPTS} attempts: {e}",
+                    exc_info=True,
+                )
+                return
+            retry_at = time.time() + RETRY_DELAY_SECONDS
+            await asyncio.to_thread(self.store.retry_at, call_id, retry_at)
+            self._wheel.schedule(call_id, retry_at)
+            logger.warning(
+                f"Callback for call {call_id} failed, retrying at "
+                f"{datetime.fromtimestamp(retry_at).isoformat()}: {e}"
+            )
+            return
+        # If this write fails, _run re-arms the callback and the action runs again
+        await asyncio.to_thread(self.store.set_status, call_id, "fired")
+        logger.info(f"Callback fired for call {call_id}")
+
+
+callback_scheduler = CallbackScheduler(
+    CallbackStore(settings.callback_db_path),
+    tick_seconds=settings.callback_tick_seconds,
+)
@@ -1,21 +1,46 @@
+import hashlib
 import json
 import logging
-from datetime import datetime, timedelta
+import threading
+from datetime import datetime, timedelta, timezone
 from typing import Optional
+from zoneinfo import ZoneInfo
 
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 
 from app.config import settings
-from app.models import CancelDetails, MeetingDetails, MeetingType
+from app.models import CallbackDetails, CancelDetails, MeetingDetails, MeetingType
+from app.services.profiling import stage
 
 logger = logging.getLogger(__name__)
 
 HST_TIMEZONE = "Pacific/Honolulu"
+CALLBACK_HOLD_MINUTES = 15
+
+# Partial-response masks: only request the fields we actually read
+INSERT_FIELDS = "id,htmlLink"
+SEARCH_FIELDS = "items(id,summary,description,start,created)"
+SEARCH_MAX_RESULTS = 50
+GET_FIELDS = "id,summary,status,htmlLink"
+
+# httplib2 connections are not thread-safe, so cache one service per thread
+_local = threading.local()
 
 
 def _get_calendar_service():
+    """Return an authenticated Google Calendar service, reusing this thread's connection."""
+    service = getattr(_local, "service", None)
+    if service is None:
+        with stage("google:build_service"):
+            service = _build_calendar_service()
+        _local.service = service
+    return service
+
+
+def _build_calendar_service():
     """Build and return an authenticated Google Calendar service."""
     token_data = json.loads(settings.google_token_json)
     creds = Credentials(
@@ -31,7 +56,13 @@ def _get_calendar_service():
         creds.refresh(Request())
         logger.info("Google OAuth token refreshed")
 
-    return build("calendar", "v3", credentials=creds)
+    return build("calendar", "v3", credentials=creds, cache_discovery=False)
+
+
+def _execute(request) -> dict:
+    """Execute an API request, timed as a profiling stage."""
+    with stage(f"google:{request.methodId}"):
+        return request.execute()
 
 
 def create_calendar_event(meeting: MeetingDetails) -> dict:
@@ -80,39 +111,113 @@ def create_calendar_event(meeting: MeetingDetails) -> dict:
         },
     }
 
-    event = (
-        service.events()
-        .insert(calendarId=settings.google_calendar_id, body=event_body)
-        .execute()
-    )
+    return _insert_once(service, event_id_for_call(meeting.call_id), event_body)
+
+
+def create_callback_hold(callback: CallbackDetails) -> dict:
+    """Block out time on the calendar to return a caller's call."""
+    service = _get_calendar_service()
+
+    start_dt = callback.due_at.astimezone(ZoneInfo(HST_TIMEZONE))
+    end_dt = start_dt + timedelta(minutes=CALLBACK_HOLD_MINUTES)
+
+    description_parts = [
+        f"Client: {callback.caller_name}",
+        f"Phone: {callback.caller_phone}",
+        f"Call ID: {callback.call_id}",
+    ]
+    if callback.call_summary:
+        description_parts.append(f"\nCall Summary:\n{callback.call_summary}")
+
+    event_body = {
+        "summary": f"Callback - {callback.caller_name} ({callback.caller_phone})",
+        "description": "\n".join(description_parts),
+        "start": {
+            "dateTime": start_dt.strftime("%Y-%m-%dT%H:%M:%S"),
+            "timeZone": HST_TIMEZONE,
+        },
+        "end": {
+            "dateTime": end_dt.strftime("%Y-%m-%dT%H:%M:%S"),
+            "timeZone": HST_TIMEZONE,
+        },
+        "reminders": {
+            "useDefault": False,
+            "overrides": [
+                {"method": "popup", "minutes": 0},
+            ],
+        },
+    }
+
+    return _insert_once(service, event_id_for_call(f"callback:{callback.call_id}"), event_body)
+
+
+def event_id_for_call(call_id: str) -> str:
+    """Deterministic event ID for a call, so retried creates cannot double-book.
+
+    Hex digits are a subset of the base32hex alphabet Calendar allows in IDs.
+    """
+    return hashlib.sha256(call_id.encode()).hexdigest()[:32]
+
+
+def _insert_once(service, event_id: str, event_body: dict) -> dict:
+    """Insert an event under a fixed ID, returning the existing one if it was already created.
+
+    Calendar keeps the IDs of deleted events, so if the event was created
+    and later deleted, the returned event has status "cancelled" and
+    nothing is booked.
+    """
+    try:
+        return _execute(
+            service.events().insert(
+                calendarId=settings.google_calendar_id,
+                body={**event_body, "id": event_id},
+                fields=INSERT_FIELDS,
+            )
+        )
+    except HttpError as e:
+        if e.resp.status != 409:
+            raise
+        existing = _execute(
+            service.events().get(
+                calendarId=settings.google_calendar_id,
+                eventId=event_id,
+                fields=GET_FIELDS,
+            )
+        )
+        if existing.get("status") == "cancelled":
+            logger.warning(
+                f"Calendar event {event_id} was created and later deleted; not recreating it"
+            )
+        else:
+            logger.info(f"Calendar event {event_id} already exists, not creating a duplicate")
+        return existing
 
-    return event
 
+def find_event_by_caller(
+    caller_name: str, caller_phone: str, as_of: Optional[datetime] = None
+) -> Optional[dict]:
+    """Search for an upcoming calendar event matching the caller's name or phone.
 
-def find_event_by_caller(caller_name: str, caller_phone: str) -> Optional[dict]:
-    """Search for an upcoming calendar event matching the caller's name or phone."""
+    Upcoming means as of now, or as of ``as_of`` when replaying an older
+    call. In that case only events that already existed at ``as_of`` match,
+    so the result is the event the call referred to rather than a later
+    booking.
+    """
     service = _get_calendar_service()
 
-    # Search future events only
-    now = datetime.utcnow().isoformat() + "Z"
+    # Search forward from the reference time, within the configured window
+    now = as_of.astimezone(timezone.utc).replace(tzinfo=None) if as_of else datetime.utcnow()
+    time_min = now.isoformat() + "Z"
+    time_max = (now + timedelta(days=settings.calendar_search_window_days)).isoformat() + "Z"
+
+    def existed(event: dict) -> bool:
+        return as_of is None or _parse_rfc3339(event["created"]) <= as_of
 
     # Search by caller name in event summary
-    events_result = (
-        service.events()
-        .list(
-            calendarId=settings.google_calendar_id,
-            timeMin=now,
-            maxResults=50,
-            singleEvents=True,
-            orderBy="startTime",
-            q=caller_name,
-        )
-        .execute()
-    )
-    events = events_result.get("items", [])
+    events = _search_events(service, caller_name, time_min, time_max)
 
     # Try to match by name in summary or phone in description
-    for event in events:
+    for event in filter(existed, events):
         summary = event.get("summary", "")
         description = event.get("description", "")
         if caller_name.lower() in summary.lower():
@@ -122,19 +227,7 @@ def find_event_by_caller(caller_name: str, caller_phone: str) -> Optional[dict]:
 
     # If name didn't match, try searching by phone number
     if caller_phone:
-        events_result = (
-            service.events()
-            .list(
-                calendarId=settings.google_calendar_id,
-                timeMin=now,
-                maxResults=50,
-                singleEvents=True,
-                orderBy="startTime",
-                q=caller_phone,
-            )
-            .execute()
-        )
-        for event in events_result.get("items", []):
+        for event in filter(existed, _search_events(service, caller_phone, time_min, time_max)):
             description = event.get("description", "")
             if caller_phone in description:
                 return event
@@ -142,10 +235,62 @@ def find_event_by_caller(caller_name: str, caller_phone: str) -> Optional[dict]:
     return None
 
 
+def has_started(event: dict) -> bool:
+    """Whether an event returned by find_event_by_caller starts before now."""
+    start = event.get("start", {})
+    if "dateTime" in start:
+        return _parse_rfc3339(start["dateTime"]) <= datetime.now(timezone.utc)
+    # All-day events only carry a date, in the calendar's own timezone
+    return start.get("date", "9999-12-31") <= datetime.now(ZoneInfo(HST_TIMEZONE)).date().isoformat()
+
+
+def _parse_rfc3339(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _search_events(service, query: str, time_min: str, time_max: str) -> list[dict]:
+    """Free-text search of upcoming events, returning only the fields find_event_by_caller reads."""
+    events_result = _execute(
+        service.events().list(
+            calendarId=settings.google_calendar_id,
+            timeMin=time_min,
+            timeMax=time_max,
+            maxResults=SEARCH_MAX_RESULTS,
+            singleEvents=True,
+            orderBy="startTime",
+            q=query,
+            fields=SEARCH_FIELDS,
+        )
+    )
+    return events_result.get("items", [])
+
+
+def get_calendar_event(event_id: str) -> Optional[dict]:
+    """Fetch an event by ID, or None if it never existed.
+
+    Deleted events are still returned, with status "cancelled".
+    """
+    service = _get_calendar_service()
+    try:
+        return _execute(
+            service.events().get(
+                calendarId=settings.google_calendar_id,
+                eventId=event_id,
+                fields=GET_FIELDS,
+            )
+        )
+    except HttpError as e:
+        if e.resp.status == 404:
+            return None
+        raise
+
+
 def delete_calendar_event(event_id: str) -> None:
     """Delete a calendar event by its ID."""
     service = _get_calendar_service()
-    service.events().delete(
-        calendarId=settings.google_calendar_id, eventId=event_id
-    ).execute()
+    _execute(
+        service.events().delete(
+            calendarId=settings.google_calendar_id, eventId=event_id
+        )
+    )
     logger.info(f"Calendar event deleted: {event_id}")
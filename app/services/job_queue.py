@@ -0,0 +1,349 @@
+import json
+import logging
+import sqlite3
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import closing
+from functools import lru_cache
+from typing import Any, NamedTuple, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Job(NamedTuple):
+    id: str
+    payload: dict[str, Any]
+    attempts: int
+    lease_token: str
+
+
+class JobQueue(ABC):
+    """Shared queue of webhook jobs with leases.
+
+    A leased job is invisible to other workers until its visibility timeout
+    runs out. Workers extend the lease with ``heartbeat`` while they work,
+    and finish it with ``ack`` or ``fail``. A job whose lease expires (the
+    worker died) becomes visible again. Heartbeat, ack and fail are fenced
+    by the lease token, so a worker that lost its lease cannot finish a job
+    that someone else now holds.
+    """
+
+    @abstractmethod
+    def enqueue(self, dedupe_key: str, payload: dict[str, Any]) -> bool:
+        """Add a job. Returns False if a job with this key was already enqueued."""
+
+    @abstractmethod
+    def lease(self, worker_id: str, visibility_timeout: float) -> Optional[Job]:
+        """Claim the next available job, or return None if there is none."""
+
+    @abstractmethod
+    def heartbeat(self, job: Job, visibility_timeout: float) -> bool:
+        """Extend a lease. Returns False if the lease was lost."""
+
+    @abstractmethod
+    def ack(self, job: Job) -> bool:
+        """Mark a job done. Returns False if the lease was lost."""
+
+    @abstractmethod
+    def fail(self, job: Job, error: str, retry_delay: float) -> bool:
+        """Release a job for retry after ``retry_delay``, or dead-letter it after max attempts."""
+
+    @abstractmethod
+    def stats(self) -> dict[str, int]:
+        """Job counts by status."""
+
+
+class SQLiteJobQueue(JobQueue):
+    """Job queue in a local SQLite file, shared by processes on the same host or volume."""
+
+    def __init__(self, path: str, max_attempts: int):
+        self.path = path
+        self.max_attempts = max_attempts
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    dedupe_key TEXT NOT NULL UNIQUE,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    available_at REAL NOT NULL,
+                    lease_owner TEXT,
+                    lease_token TEXT,
+                    lease_expires_at REAL,
+                    last_error TEXT,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, available_at)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_leases ON jobs (status, lease_expires_at)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode; multi-statement updates use explicit BEGIN IMMEDIATE
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def enqueue(self, dedupe_key: str, payload: dict[str, Any]) -> bool:
+        now = time.time()
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO jobs (dedupe_key, payload, available_at, updated_at) "
+                "VALUES (?, ?, ?, ?)",
+                (dedupe_key, json.dumps(payload), now, now),
+            )
+            return cursor.rowcount == 1
+
+    def lease(self, worker_id: str, visibility_timeout: float) -> Optional[Job]:
+        now = time.time()
+        with closing(self._connect()) as conn:
+            # The write lock makes select-then-update atomic across processes
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                while True:
+                    row = conn.execute(
+                        """
+                        SELECT id, payload, attempts FROM jobs
+                        WHERE (status = 'queued' AND available_at <= ?)
+                           OR (status = 'leased' AND lease_expires_at <= ?)
+                        ORDER BY available_at
+                        LIMIT 1
+                        """,
+                        (now, now),
+                    ).fetchone()
+                    if row is None:
+                        conn.execute("COMMIT")
+                        return None
+
+                    job_id, payload, attempts = row
+                    if attempts >= self.max_attempts:
+                        # Its last worker died mid-job too many times
+                        conn.execute(
+                            "UPDATE jobs SET status = 'dead', last_error = ?, updated_at = ? "
+                            "WHERE id = ?",
+                            ("lease expired on final attempt", now, job_id),
+                        )
+                        logger.error(f"Job {job_id} dead-lettered after {attempts} attempts")
+                        continue
+
+                    token = uuid.uuid4().hex
+                    conn.execute(
+                        """
+                        UPDATE jobs SET status = 'leased', lease_owner = ?, lease_token = ?,
+                            lease_expires_at = ?, attempts = attempts + 1, updated_at = ?
+                        WHERE id = ?
+                        """,
+                        (worker_id, token, now + visibility_timeout, now, job_id),
+                    )
+                    conn.execute("COMMIT")
+                    return Job(str(job_id), json.loads(payload), attempts + 1, token)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def heartbeat(self, job: Job, visibility_timeout: float) -> bool:
+        now = time.time()
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires_at = ?, updated_at = ? "
+                "WHERE id = ? AND lease_token = ? AND status = 'leased'",
+                (now + visibility_timeout, now, int(job.id), job.lease_token),
+            )
+            return cursor.rowcount == 1
+
+    def ack(self, job: Job) -> bool:
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'done', lease_token = NULL, updated_at = ? "
+                "WHERE id = ? AND lease_token = ? AND status = 'leased'",
+                (time.time(), int(job.id), job.lease_token),
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, job: Job, error: str, retry_delay: float) -> bool:
+        now = time.time()
+        dead = job.attempts >= self.max_attempts
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                """
+                UPDATE jobs SET status = ?, available_at = ?, lease_token = NULL,
+                    last_error = ?, updated_at = ?
+                WHERE id = ? AND lease_token = ? AND status = 'leased'
+                """,
+                (
+                    "dead" if dead else "queued",
+                    now + retry_delay,
+                    error,
+                    now,
+                    int(job.id),
+                    job.lease_token,
+                ),
+            )
+            return cursor.rowcount == 1
+
+    def stats(self) -> dict[str, int]:
+        with closing(self._connect()) as conn:
+            return dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"))
+
+
+# Redis scripts keep each multi-key step atomic across workers.
+# KEYS: ready list, delayed zset, leased zset, dead list
+_LEASE_SCRIPT = """
+local now = tonumber(ARGV[1])
+-- Delayed retries that are due, and leases that expired, become ready again
+for _, zset in ipairs({KEYS[2], KEYS[3]}) do
+    for _, id in ipairs(redis.call('ZRANGEBYSCORE', zset, '-inf', now)) do
+        redis.call('ZREM', zset, id)
+        redis.call('HDEL', ARGV[4] .. id, 'token')
+        redis.call('RPUSH', KEYS[1], id)
+    end
+end
+while true do
+    local id = redis.call('LPOP', KEYS[1])
+    if not id then return false end
+    local job_key = ARGV[4] .. id
+    local attempts = tonumber(redis.call('HGET', job_key, 'attempts') or '0')
+    if attempts >= tonumber(ARGV[5]) then
+        redis.call('HSET', job_key, 'status', 'dead', 'last_error', 'lease expired on final attempt')
+        redis.call('RPUSH', KEYS[4], id)
+    else
+        redis.call('ZADD', KEYS[3], now + tonumber(ARGV[2]), id)
+        redis.call('HSET', job_key, 'status', 'leased', 'token', ARGV[3])
+        attempts = redis.call('HINCRBY', job_key, 'attempts', 1)
+        return {id, redis.call('HGET', job_key, 'payload'), attempts}
+    end
+end
+"""
+
+# KEYS: leased zset, job hash ; ARGV: id, token, new expiry
+_HEARTBEAT_SCRIPT = """
+if redis.call('HGET', KEYS[2], 'token') ~= ARGV[2] then return 0 end
+if not redis.call('ZSCORE', KEYS[1], ARGV[1]) then return 0 end
+redis.call('ZADD', KEYS[1], ARGV[3], ARGV[1])
+return 1
+"""
+
+# KEYS: leased zset, job hash, delayed zset, dead list ; ARGV: id, token, outcome, retry_at, error
+_FINISH_SCRIPT = """
+if redis.call('HGET', KEYS[2], 'token') ~= ARGV[2] then return 0 end
+if redis.call('ZREM', KEYS[1], ARGV[1]) == 0 then return 0 end
+redis.call('HDEL', KEYS[2], 'token')
+redis.call('HSET', KEYS[2], 'status', ARGV[3])
+if ARGV[3] == 'queued' then
+    redis.call('HSET', KEYS[2], 'last_error', ARGV[5])
+    redis.call('ZADD', KEYS[3], ARGV[4], ARGV[1])
+elseif ARGV[3] == 'dead' then
+    redis.call('HSET', KEYS[2], 'last_error', ARGV[5])
+    redis.call('RPUSH', KEYS[4], ARGV[1])
+end
+return 1
+"""
+
+# How long finished job records and dedupe keys are kept
+REDIS_RETENTION_SECONDS = 7 * 24 * 3600
+
+
+class RedisJobQueue(JobQueue):
+    """Job queue in Redis, for workers on several nodes. Requires the ``redis`` package."""
+
+    def __init__(self, url: str, max_attempts: int, prefix: str = "post-call-jobs"):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError(
+                "JOB_QUEUE_BACKEND=redis requires the redis package (pip install redis)"
+            ) from None
+
+        self.max_attempts = max_attempts
+        self.prefix = prefix
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self._lease = self._redis.register_script(_LEASE_SCRIPT)
+        self._heartbeat = self._redis.register_script(_HEARTBEAT_SCRIPT)
+        self._finish = self._redis.register_script(_FINISH_SCRIPT)
+
+    def _key(self, name: str) -> str:
+        return f"{self.prefix}:{name}"
+
+    def enqueue(self, dedupe_key: str, payload: dict[str, Any]) -> bool:
+        if not self._redis.set(
+            self._key(f"dedupe:{dedupe_key}"), 1, nx=True, ex=REDIS_RETENTION_SECONDS
+        ):
+            return False
+        job_id = str(self._redis.incr(self._key("seq")))
+        pipe = self._redis.pipeline()
+        pipe.hset(
+            self._key(f"job:{job_id}"),
+            mapping={"payload": json.dumps(payload), "status": "queued", "attempts": 0},
+        )
+        pipe.rpush(self._key("ready"), job_id)
+        pipe.execute()
+        return True
+
+    def lease(self, worker_id: str, visibility_timeout: float) -> Optional[Job]:
+        token = f"{worker_id}:{uuid.uuid4().hex}"
+        result = self._lease(
+            keys=[self._key("ready"), self._key("delayed"), self._key("leased"), self._key("dead")],
+            args=[time.time(), visibility_timeout, token, self._key("job:"), self.max_attempts],
+        )
+        if not result:
+            return None
+        job_id, payload, attempts = result
+        return Job(job_id, json.loads(payload), int(attempts), token)
+
+    def heartbeat(self, job: Job, visibility_timeout: float) -> bool:
+        return bool(
+            self._heartbeat(
+                keys=[self._key("leased"), self._key(f"job:{job.id}")],
+                args=[job.id, job.lease_token, time.time() + visibility_timeout],
+            )
+        )
+
+    def _finish_job(self, job: Job, status: str, retry_at: float = 0, error: str = "") -> bool:
+        finished = bool(
+            self._finish(
+                keys=[
+                    self._key("leased"),
+                    self._key(f"job:{job.id}"),
+                    self._key("delayed"),
+                    self._key("dead"),
+                ],
+                args=[job.id, job.lease_token, status, retry_at, error],
+            )
+        )
+        if finished and status == "done":
+            self._redis.expire(self._key(f"job:{job.id}"), REDIS_RETENTION_SECONDS)
+        return finished
+
+    def ack(self, job: Job) -> bool:
+        return self._finish_job(job, "done")
+
+    def fail(self, job: Job, error: str, retry_delay: float) -> bool:
+        status = "dead" if job.attempts >= self.max_attempts else "queued"
+        return self._finish_job(job, status, time.time() + retry_delay, error)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "queued": self._redis.llen(self._key("ready")) + self._redis.zcard(self._key("delayed")),
+            "leased": self._redis.zcard(self._key("leased")),
+            "dead": self._redis.llen(self._key("dead")),
+        }
+
+
+@lru_cache
+def get_job_queue() -> JobQueue:
+    """The job queue backend selected by JOB_QUEUE_BACKEND."""
+    if settings.job_queue_backend == "sqlite":
+        return SQLiteJobQueue(settings.job_queue_path, settings.job_max_attempts)
+    if settings.job_queue_backend == "redis":
+        return RedisJobQueue(settings.job_queue_url, settings.job_max_attempts)
+    raise ValueError(
+        f"Unknown JOB_QUEUE_BACKEND '{settings.job_queue_backend}', expected sqlite or redis"
+    )
@@ -0,0 +1,208 @@
+from collections import deque
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from app.models import CallData, CallOutcome
+
+# Phrase -> weight. Matching is case-insensitive substring matching on what
+# the caller said (agent turns are ignored); "'" and "’" are treated alike.
+PHRASE_RULES: dict[CallOutcome, dict[str, float]] = {
+    CallOutcome.MEETING_CANCELLED: {
+        "cancel my": 3.0,
+        "need to cancel": 3.0,
+        "want to cancel": 3.0,
+        "like to cancel": 3.0,
+        "cancel the meeting": 3.0,
+        "cancel the appointment": 3.0,
+        "call it off": 2.0,
+        "won't be able to make it": 1.5,
+        "can't make it": 1.0,
+    },
+    CallOutcome.MEETING_RESCHEDULED: {
+        "reschedule": 4.0,
+        "move my meeting": 3.0,
+        "move my appointment": 3.0,
+        "change my appointment": 3.0,
+        "change the time": 2.0,
+        "move it to": 2.0,
+        "push it back": 2.0,
+        "different time": 1.5,
+        "different day": 1.5,
+    },
+    CallOutcome.CALLBACK_REQUESTED: {
+        "call me back": 3.0,
+        "have someone call": 3.0,
+        "call back": 2.0,
+        "callback": 2.0,
+        "give me a call": 2.0,
+        "reach out to me": 2.0,
+    },
+    CallOutcome.MEETING_BOOKED: {
+        "book a": 1.5,
+        "schedule a": 1.5,
+        "set up a": 1.5,
+        "discovery call": 1.0,
+        "discovery meeting": 1.0,
+        "works for me": 1.0,
+        "works great": 1.0,
+    },
+}
+
+# Tool invocation name -> (outcome, weight)
+TOOL_RULES: dict[str, tuple[CallOutcome, float]] = {
+    "check_available_dates": (CallOutcome.MEETING_BOOKED, 2.0),
+}
+
+# A phrase or tool repeated over and over should not drown out everything else
+MAX_HITS_PER_PHRASE = 3
+# Winning score at which the evidence counts as strong
+SATURATION_SCORE = 3.0
+# How far the top outcome must lead the runner-up. Inside this margin only
+# tool-call evidence can settle it; otherwise the call is left unclassified.
+MIN_MARGIN = 1.0
+
+_ROLE_PREFIXES = ("agent:", "user:")
+
+
+class ClassifiedOutcome(NamedTuple):
+    outcome: Optional[CallOutcome]
+    confidence: float
+    scores: dict[CallOutcome, float]
+
+
+class PhraseMatcher:
+    """Aho-Corasick automaton over a fixed phrase set.
+
+    The automaton is compiled to a full transition table once, so scanning
+    is a single dict lookup per character: O(len(text) + matches) no matter
+    how many phrases there are.
+    """
+
+    def __init__(self, phrases: Iterable[str]):
+        self.phrases: list[str] = []
+        goto: list[dict[str, int]] = [{}]
+        outputs: list[list[int]] = [[]]
+
+        for phrase in phrases:
+            state = 0
+            for ch in phrase:
+                if ch not in goto[state]:
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][ch] = len(goto) - 1
+                state = goto[state][ch]
+            outputs[state].append(len(self.phrases))
+            self.phrases.append(phrase)
+
+        # Breadth-first: fill failure links and turn goto into a full DFA.
+        # Characters missing from a state's table lead back to the root.
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            fallback = goto[fail[state]]
+            outputs[state] = outputs[state] + outputs[fail[state]]
+            for ch, target in list(goto[state].items()):
+                fail[target] = fallback.get(ch, 0) if state else 0
+                queue.append(target)
+            for ch, target in fallback.items():
+                goto[state].setdefault(ch, target)
+
+        self._delta = goto
+        self._outputs = [tuple(out) for out in outputs]
+
+    def count(self, text: str, counts: list[int]) -> None:
+        """Add the number of occurrences of each phrase in ``text`` to ``counts``."""
+        delta = self._delta
+        outputs = self._outputs
+        state = 0
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            if outputs[state]:
+                for phrase_index in outputs[state]:
+                    counts[phrase_index] += 1
+
+
+def _normalize(text: str) -> str:
+    return text.lower().replace("’", "'")
+
+
+def _compile_rules() -> tuple[PhraseMatcher, list[tuple[CallOutcome, float]]]:
+    """Build the phrase matcher once, plus the (outcome, weight) of each phrase index."""
+    phrase_outcomes = []
+    phrases = []
+    for outcome, rules in PHRASE_RULES.items():
+        for phrase, weight in rules.items():
+            phrases.append(_normalize(phrase))
+            phrase_outcomes.append((outcome, weight))
+    return PhraseMatcher(phrases), phrase_outcomes
+
+
+_matcher, _phrase_outcomes = _compile_rules()
+
+
+def _user_turns(call: CallData) -> Iterator[str]:
+    """Yield what the caller said, from the most structured transcript available."""
+    for turns in (call.transcript_object, call.transcript_with_tool_calls):
+        found = False
+        for item in turns or []:
+            if item.get("role") == "user" and item.get("content"):
+                found = True
+                yield item["content"]
+        if found:
+            return
+
+    # Plain transcripts are "Agent: ..." / "User: ..." lines; an unprefixed
+    # line continues the previous speaker's turn
+    speaking = False
+    for line in (call.transcript or "").splitlines():
+        head = line.lstrip()[:6].lower()
+        if head.startswith(_ROLE_PREFIXES):
+            speaking = head.startswith("user:")
+        if speaking:
+            yield line
+
+
+def classify_outcome(call: CallData) -> ClassifiedOutcome:
+    """Score call outcomes from the caller's phrases and tool calls.
+
+    Confidence is the winning outcome's share of all evidence, scaled down
+    when the winning score is weak. When the top two outcomes are within
+    MIN_MARGIN of each other, the one backed by a tool call wins; if neither
+    or both are, no outcome is returned.
+    """
+    counts = [0] * len(_matcher.phrases)
+    scores = {outcome: 0.0 for outcome in PHRASE_RULES}
+
+    for text in _user_turns(call):
+        _matcher.count(_normalize(text), counts)
+
+    for (outcome, weight), hits in zip(_phrase_outcomes, counts):
+        if hits:
+            scores[outcome] += weight * min(hits, MAX_HITS_PER_PHRASE)
+
+    tool_hits = {name: 0 for name in TOOL_RULES}
+    for item in call.transcript_with_tool_calls or []:
+        if item.get("role") == "tool_call_invocation" and item.get("name") in tool_hits:
+            tool_hits[item["name"]] += 1
+    tool_backed = set()
+    for name, hits in tool_hits.items():
+        if hits:
+            outcome, weight = TOOL_RULES[name]
+            scores[outcome] += weight * min(hits, MAX_HITS_PER_PHRASE)
+            tool_backed.add(outcome)
+
+    total = sum(scores.values())
+    if not total:
+        return ClassifiedOutcome(None, 0.0, scores)
+
+    best, runner_up = sorted(
+        scores, key=lambda outcome: (scores[outcome], outcome in tool_backed), reverse=True
+    )[:2]
+    if scores[best] - scores[runner_up] < MIN_MARGIN and (
+        best not in tool_backed or runner_up in tool_backed
+    ):
+        return ClassifiedOutcome(None, 0.0, scores)
+
+    share = scores[best] / total
+    strength = min(1.0, scores[best] / SATURATION_SCORE)
+    return ClassifiedOutcome(best, round(share * strength, 3), scores)
@@ -0,0 +1,202 @@
+import contextlib
+import hmac
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Mapping, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile-token"
+
+_current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar(
+    "current_profile", default=None
+)
+# Threshold-mode profiles currently sampling
+_threshold_profiles = 0
+# A single thread writes and rotates profiles, in the order requests finish
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="profile-writer")
+
+
+class RequestProfile:
+    """Sampling profile and stage timings for a single request.
+
+    A background thread samples the stacks of every thread the request is
+    known to run on: the event loop thread plus any worker thread currently
+    inside a ``stage()``. Other requests sharing the event loop show up in
+    the loop thread's samples too, so flame graphs are most precise when the
+    service is quiet.
+    """
+
+    def __init__(self, reason: str, label: str = "request"):
+        self.reason = reason
+        self.label = label
+        self.stages: list[dict] = []
+        self.samples: Counter = Counter()
+        self.threads = {threading.get_ident()}
+        self.duration_ms = 0.0
+        self._start = 0.0
+        self._stopped = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._token = None
+
+    def __enter__(self) -> "RequestProfile":
+        global _threshold_profiles
+        # Counted on the event loop thread only, so no lock is needed
+        if self.reason == "threshold":
+            _threshold_profiles += 1
+        self._start = time.perf_counter()
+        self._token = _current_profile.set(self)
+        self._sampler = threading.Thread(target=self._sample, name="profiler", daemon=True)
+        self._sampler.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        global _threshold_profiles
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+        self._stopped.set()
+        _current_profile.reset(self._token)
+        if self.reason == "threshold":
+            _threshold_profiles -= 1
+        # Joining the sampler and writing files block, so neither happens on the event loop
+        _writer.submit(self._finish)
+
+    def _finish(self) -> None:
+        self._sampler.join()
+        if self.reason != "threshold" or self.duration_ms >= settings.profiling_slow_threshold_ms:
+            try:
+                _write_profile(self)
+            except Exception as e:
+                logger.warning(f"Could not write request profile: {e}")
+
+    def _sample(self) -> None:
+        interval = settings.profiling_interval_ms / 1000
+        while not self._stopped.wait(interval):
+            frames = sys._current_frames()
+            for thread_id in list(self.threads):
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    self.samples[_fold(frame)] += 1
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1000
+
+
+def _fold(frame) -> str:
+    """Collapse a stack into flame-graph "folded" form, outermost frame first."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def profile_request(headers: Mapping[str, str], label: str = "request"):
+    """Return a context manager that profiles the request, or a no-op one.
+
+    A request is profiled when it carries a valid profile token, when it is
+    picked by the sampling rate, or, if a slow threshold is set, whenever
+    fewer than ``profiling_max_threshold_profiles`` threshold profiles are
+    running (the profile is only kept when the request turns out slow).
+    """
+    if not settings.profiling_enabled:
+        return contextlib.nullcontext()
+
+    token = headers.get(PROFILE_HEADER, "")
+    # Compare bytes: compare_digest rejects non-ASCII str
+    if (
+        token
+        and settings.profiling_token
+        and hmac.compare_digest(token.encode(), settings.profiling_token.encode())
+    ):
+        return RequestProfile("requested", label)
+    if settings.profiling_sample_rate and random.random() < settings.profiling_sample_rate:
+        return RequestProfile("sampled", label)
+    if (
+        settings.profiling_slow_threshold_ms
+        and _threshold_profiles < settings.profiling_max_threshold_profiles
+    ):
+        return RequestProfile("threshold", label)
+    return contextlib.nullcontext()
+
+
+@contextlib.contextmanager
+def stage(name: str):
+    """Time a named stage of the current request. No-op unless it is being profiled."""
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+
+    thread_id = threading.get_ident()
+    foreign = thread_id not in profile.threads
+    if foreign:
+        profile.threads.add(thread_id)
+    start_ms = profile.elapsed_ms()
+    try:
+        yield
+    finally:
+        if foreign:
+            profile.threads.discard(thread_id)
+        profile.stages.append(
+            {
+                "stage": name,
+                "start_ms": round(start_ms, 3),
+                "duration_ms": round(profile.elapsed_ms() - start_ms, 3),
+            }
+        )
+
+
+def annotate(label: str) -> None:
+    """Name the current profile (e.g. by call ID) once it is known."""
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.label = label
+
+
+def _write_profile(profile: RequestProfile) -> None:
+    os.makedirs(settings.profiling_dir, exist_ok=True)
+    timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    safe_label = "".join(c if c.isalnum() or c in "-_" else "_" for c in profile.label)
+    base = os.path.join(settings.profiling_dir, f"{timestamp}_{safe_label}_{profile.reason}")
+
+    with open(base + ".folded", "w") as f:
+        for stack, count in profile.samples.most_common():
+            f.write(f"{stack} {count}\n")
+
+    with open(base + ".json", "w") as f:
+        json.dump(
+            {
+                "label": profile.label,
+                "reason": profile.reason,
+                "duration_ms": round(profile.duration_ms, 3),
+                "interval_ms": settings.profiling_interval_ms,
+                "samples": sum(profile.samples.values()),
+                "stages": sorted(profile.stages, key=lambda s: s["start_ms"]),
+            },
+            f,
+            indent=2,
+        )
+
+    logger.info(f"Request profile written: {base} ({profile.duration_ms:.1f} ms)")
+    _rotate(settings.profiling_dir, settings.profiling_max_profiles)
+
+
+def _rotate(directory: str, max_profiles: int) -> None:
+    """Keep only the newest ``max_profiles`` profiles (two files each)."""
+    files = sorted(
+        name for name in os.listdir(directory) if name.endswith((".folded", ".json"))
+    )
+    for name in files[: max(0, len(files) - 2 * max_profiles)]:
+        os.remove(os.path.join(directory, name))
@@ -0,0 +1,104 @@
+import math
+import time
+from typing import Hashable, Optional
+
+
+class TimerWheel:
+    """Hierarchical timing wheel keyed by arbitrary hashable ids.
+
+    Level 0 holds timers due within ``slots`` ticks, level 1 within
+    ``slots ** 2`` ticks, and so on. Scheduling and cancelling are O(1);
+    each tick inspects a single level-0 slot, and a timer is cascaded down
+    at most ``levels`` times over its lifetime. Timers beyond the top level
+    wait in an overflow bucket that is re-placed when the top level wraps.
+    """
+
+    def __init__(
+        self,
+        tick_seconds: float = 1.0,
+        slots: int = 64,
+        levels: int = 4,
+        now: Optional[float] = None,
+    ):
+        self.tick_seconds = tick_seconds
+        self._slots = slots
+        self._levels = levels
+        # Each bucket maps timer id -> due tick
+        self._wheels = [[{} for _ in range(slots)] for _ in range(levels)]
+        self._overflow: dict[Hashable, int] = {}
+        self._buckets: dict[Hashable, dict[Hashable, int]] = {}
+        self._tick = int((time.time() if now is None else now) // tick_seconds)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._buckets
+
+    def schedule(self, key: Hashable, due_at: float) -> None:
+        """Schedule (or reschedule) ``key`` to expire at epoch time ``due_at``.
+
+        Timers already due fire on the next tick.
+        """
+        self.cancel(key)
+        due_tick = max(math.ceil(due_at / self.tick_seconds), self._tick + 1)
+        self._place(key, due_tick)
+
+    def cancel(self, key: Hashable) -> bool:
+        """Remove a pending timer. Returns False if it was not scheduled."""
+        bucket = self._buckets.pop(key, None)
+        if bucket is None:
+            return False
+        del bucket[key]
+        return True
+
+    def advance(self, now: Optional[float] = None) -> list[Hashable]:
+        """Move the wheel forward to ``now`` and return the ids that expired."""
+        target = int((time.time() if now is None else now) // self.tick_seconds)
+        expired: list[Hashable] = []
+        while self._tick < target:
+            if not self._buckets:
+                # Nothing pending, so there is nothing to cascade or fire
+                self._tick = target
+                break
+            self._tick += 1
+            self._cascade()
+            bucket = self._wheels[0][self._tick % self._slots]
+            if bucket:
+                for key in bucket:
+                    del self._buckets[key]
+                expired.extend(bucket)
+                bucket.clear()
+        return expired
+
+    def _place(self, key: Hashable, due_tick: int) -> None:
+        delta = due_tick - self._tick
+        resolution = 1
+        for level in range(self._levels):
+            if delta < resolution * self._slots:
+                bucket = self._wheels[level][(due_tick // resolution) % self._slots]
+                break
+            resolution *= self._slots
+        else:
+            bucket = self._overflow
+        bucket[key] = due_tick
+        self._buckets[key] = bucket
+
+    def _cascade(self) -> None:
+        """Pull timers down from higher levels whose slot the wheel just reached."""
+        tick = self._tick
+        for level in range(1, self._levels):
+            if tick % self._slots:
+                return
+            tick //= self._slots
+            self._replace(self._wheels[level][tick % self._slots])
+        if tick % self._slots == 0:
+            self._replace(self._overflow)
+
+    def _replace(self, bucket: dict[Hashable, int]) -> None:
+        if not bucket:
+            return
+        timers = list(bucket.items())
+        bucket.clear()
+        for key, due_tick in timers:
+            self._place(key, due_tick)
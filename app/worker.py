@@ -0,0 +1,141 @@
+"""
+Standalone worker that drains webhook jobs from the shared job queue.
+
+Run the web process with WEBHOOK_PROCESSING=queue, then start as many
+workers as needed, on this host (SQLite backend) or on several nodes
+(Redis backend):
+
+Usage: python -m app.worker [--processes 4] [--concurrency 2]
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+
+from app.config import settings
+from app.handlers.call_handler import handle_call_analyzed
+from app.models import CallOutcome, WebhookPayload
+from app.services.call_parser import parse_call_outcome
+from app.services.job_queue import Job, JobQueue, get_job_queue
+
+logger = logging.getLogger("app.worker")
+
+
+async def _heartbeat(queue: JobQueue, job: Job) -> None:
+    """Keep extending the lease while the job is being processed."""
+    timeout = settings.job_visibility_timeout_seconds
+    while True:
+        await asyncio.sleep(timeout / 3)
+        if not await asyncio.to_thread(queue.heartbeat, job, timeout):
+            logger.warning(f"Lost lease on job {job.id}; another worker may pick it up")
+            return
+
+
+async def process_job(queue: JobQueue, job: Job) -> None:
+    """Run one leased job through the normal call handlers, then ack or fail it."""
+    heartbeat = asyncio.create_task(_heartbeat(queue, job))
+    try:
+        payload = WebhookPayload(**job.payload)
+        logger.info(f"Processing job {job.id} (attempt {job.attempts}) for call {payload.call.call_id}")
+        outcome = parse_call_outcome(payload.call)
+        if outcome == CallOutcome.CALLBACK_REQUESTED:
+            # The web process schedules callbacks itself; a callback stored
+            # here would never reach its scheduler
+            logger.warning(
+                f"Job {job.id} is a callback request; callbacks are scheduled by the web process"
+            )
+        else:
+            await handle_call_analyzed(payload.call, outcome)
+    except Exception as e:
+        # Exponential backoff: base, 2x base, 4x base, ...
+        retry_delay = settings.job_retry_delay_seconds * 2 ** (job.attempts - 1)
+        await asyncio.to_thread(queue.fail, job, repr(e), retry_delay)
+        logger.error(f"Job {job.id} failed on attempt {job.attempts}: {e}", exc_info=True)
+    else:
+        if not await asyncio.to_thread(queue.ack, job):
+            logger.warning(f"Job {job.id} finished after its lease was lost")
+    finally:
+        heartbeat.cancel()
+
+
+async def _consume(queue: JobQueue, worker_id: str, stopping: asyncio.Event) -> None:
+    while not stopping.is_set():
+        job = await asyncio.to_thread(
+            queue.lease, worker_id, settings.job_visibility_timeout_seconds
+        )
+        if job is None:
+            try:
+                await asyncio.wait_for(stopping.wait(), settings.worker_poll_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        await process_job(queue, job)
+
+
+async def run_worker(concurrency: int) -> None:
+    """Lease and process jobs until SIGINT/SIGTERM, finishing in-flight jobs first."""
+    queue = get_job_queue()
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    logger.info(
+        f"Worker {worker_id} started ({settings.job_queue_backend} queue, "
+        f"concurrency {concurrency})"
+    )
+    await asyncio.gather(
+        *(_consume(queue, f"{worker_id}:{i}", stopping) for i in range(concurrency))
+    )
+    logger.info(f"Worker {worker_id} stopped")
+
+
+def _run_process(concurrency: int) -> None:
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    asyncio.run(run_worker(concurrency))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process queued Retell webhook jobs")
+    parser.add_argument(
+        "--processes", type=int, default=1, help="Worker processes to start on this host"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=1, help="Jobs processed at once per process"
+    )
+    args = parser.parse_args()
+
+    if args.processes == 1:
+        _run_process(args.concurrency)
+        return
+
+    processes = [
+        multiprocessing.Process(target=_run_process, args=(args.concurrency,))
+        for _ in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    def forward_sigterm(signum, frame):
+        # Each child drains its in-flight jobs on SIGTERM
+        for process in processes:
+            process.terminate()
+
+    # Children already receive a terminal's SIGINT themselves
+    signal.signal(signal.SIGTERM, forward_sigterm)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
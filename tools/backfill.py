@@ -0,0 +1,400 @@
+"""
+Replay exported Retell call records (JSONL) through the post-call pipeline.
+
+Each line is either a webhook payload ({"event": ..., "call": {...}}) or a
+bare call object. The export is streamed in batches: outcome parsing and
+detail extraction run across a process pool, then calendar changes are
+applied with bounded concurrency. Records for the same caller are applied
+in file order. A checkpoint is written after every batch, so an
+interrupted run resumes where it stopped.
+
+Historical cancels and reschedules are only reported unless
+--replay-cancels is given. When replayed, the event to delete is looked up
+as of the call's start time, among events that existed then, and is left
+alone if it has already taken place. Callbacks are only scheduled for
+calls that ended within --callback-max-age-hours; older ones are reported.
+
+Usage:
+  PYTHONPATH=. python tools/backfill.py calls.jsonl --dry-run
+  PYTHONPATH=. python tools/backfill.py calls.jsonl [--processes 4] [--concurrency 4] [--batch-size 100]
+      [--replay-cancels] [--callback-max-age-hours 24]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Iterator, NamedTuple, Optional
+
+from app.handlers.callback_handler import handle_callback_requested
+from app.handlers.meeting_handler import (
+    handle_meeting_booked,
+    handle_meeting_cancelled,
+    handle_meeting_rescheduled,
+)
+from app.models import (
+    CallbackDetails,
+    CallData,
+    CallOutcome,
+    CancelDetails,
+    MeetingDetails,
+)
+from app.services.call_parser import (
+    extract_callback_details,
+    extract_cancel_details,
+    extract_meeting_details,
+    parse_call_outcome,
+)
+from app.services.google_calendar import (
+    event_id_for_call,
+    find_event_by_caller,
+    get_calendar_event,
+    has_started,
+)
+
+logger = logging.getLogger("backfill")
+
+
+class Plan(NamedTuple):
+    """What a single export line should do to the calendar."""
+    line: int
+    call_id: str = ""
+    outcome: Optional[CallOutcome] = None
+    meeting: Optional[MeetingDetails] = None
+    cancel: Optional[CancelDetails] = None
+    callback: Optional[CallbackDetails] = None
+    started_at: Optional[datetime] = None
+    ended_at: Optional[datetime] = None
+    error: Optional[str] = None
+    skipped: Optional[str] = None
+
+    @property
+    def caller_key(self) -> str:
+        details = self.cancel or self.meeting or self.callback
+        return details.caller_phone if details else f"line:{self.line}"
+
+    @property
+    def actionable(self) -> bool:
+        return (
+            self.error is None
+            and self.skipped is None
+            and any((self.meeting, self.cancel, self.callback))
+        )
+
+
+def _from_millis(timestamp: Optional[int]) -> Optional[datetime]:
+    return datetime.fromtimestamp(timestamp / 1000, timezone.utc) if timestamp else None
+
+
+def plan_line(numbered_line: tuple[int, str]) -> Plan:
+    """Parse one export line and extract what it should do. Runs in a worker process."""
+    line_no, line = numbered_line
+    try:
+        record = json.loads(line)
+        call = CallData(**record.get("call", record))
+        outcome = parse_call_outcome(call)
+        plan = Plan(
+            line_no,
+            call.call_id,
+            outcome,
+            started_at=_from_millis(call.start_timestamp),
+            ended_at=_from_millis(call.end_timestamp),
+        )
+
+        if outcome == CallOutcome.MEETING_BOOKED:
+            meeting = extract_meeting_details(call)
+            if not meeting:
+                return plan._replace(error="could not extract meeting details")
+            return plan._replace(meeting=meeting)
+
+        if outcome == CallOutcome.MEETING_CANCELLED:
+            cancel = extract_cancel_details(call)
+            if not cancel:
+                return plan._replace(error="could not extract cancel details")
+            return plan._replace(cancel=cancel)
+
+        if outcome == CallOutcome.MEETING_RESCHEDULED:
+            cancel = extract_cancel_details(call)
+            meeting = extract_meeting_details(call)
+            if not (cancel and meeting):
+                return plan._replace(error="could not extract reschedule details")
+            return plan._replace(cancel=cancel, meeting=meeting)
+
+        if outcome == CallOutcome.CALLBACK_REQUESTED:
+            callback = extract_callback_details(call)
+            if not callback:
+                return plan._replace(error="could not extract callback details")
+            return plan._replace(callback=callback)
+
+        return plan
+    except Exception as e:
+        return Plan(line_no, error=f"{type(e).__name__}: {e}")
+
+
+def gate_plan(plan: Plan, replay_cancels: bool, callback_max_age: timedelta) -> Plan:
+    """Mark plans that must not be replayed as skipped, with the reason."""
+    if not plan.actionable:
+        return plan
+    if plan.cancel:
+        if not replay_cancels:
+            return plan._replace(skipped="historical cancel/reschedule; pass --replay-cancels")
+        if plan.started_at is None:
+            return plan._replace(skipped="no start_timestamp to tell which event it referred to")
+    if plan.callback:
+        if plan.ended_at is None:
+            return plan._replace(skipped="callback with no end_timestamp; age unknown")
+        if datetime.now(timezone.utc) - plan.ended_at > callback_max_age:
+            return plan._replace(
+                skipped=f"stale callback from call ended {plan.ended_at.isoformat()}"
+            )
+    return plan
+
+
+async def apply_plan(plan: Plan) -> None:
+    """Apply a plan through the same handlers the webhook uses."""
+    if plan.outcome == CallOutcome.MEETING_BOOKED:
+        await handle_meeting_booked(plan.meeting)
+    elif plan.outcome == CallOutcome.MEETING_CANCELLED:
+        await handle_meeting_cancelled(plan.cancel, as_of=plan.started_at)
+    elif plan.outcome == CallOutcome.MEETING_RESCHEDULED:
+        await handle_meeting_rescheduled(plan.cancel, plan.meeting, as_of=plan.started_at)
+    elif plan.outcome == CallOutcome.CALLBACK_REQUESTED:
+        await handle_callback_requested(plan.callback)
+
+
+async def diff_plan(plan: Plan) -> list[str]:
+    """Describe what applying the plan would change, against current calendar state.
+
+    Cancels are looked up as of the call's start time, the same way they are
+    applied. Each record is compared with the calendar as it is now, not as
+    earlier records in the export would leave it.
+    """
+    prefix = f"{plan.line:>7} {plan.call_id}"
+    if plan.error:
+        return [f"{prefix} ! {plan.error}"]
+    if plan.skipped:
+        return [f"{prefix} ~ {plan.outcome.value} skipped: {plan.skipped}"]
+    if not plan.actionable:
+        return [f"{prefix}   {plan.outcome.value}: no calendar change"]
+
+    lines = []
+    if plan.cancel:
+        existing = await asyncio.to_thread(
+            find_event_by_caller,
+            plan.cancel.caller_name,
+            plan.cancel.caller_phone,
+            plan.started_at,
+        )
+        if existing and plan.meeting and existing["id"] == event_id_for_call(plan.meeting.call_id):
+            return [f"{prefix} = reschedule already applied: {existing.get('summary')}"]
+        if existing and has_started(existing):
+            lines.append(f"{prefix} = {existing.get('summary')} already took place; left alone")
+        elif existing:
+            lines.append(f"{prefix} - delete {existing.get('summary')} ({existing['id']})")
+        else:
+            lines.append(
+                f"{prefix} ! no event for {plan.cancel.caller_name} "
+                f"as of {plan.started_at.isoformat()}"
+            )
+
+    if plan.meeting:
+        existing = await asyncio.to_thread(
+            get_calendar_event, event_id_for_call(plan.meeting.call_id)
+        )
+        target = (
+            f"{plan.meeting.caller_name} ({plan.meeting.meeting_type.value}) "
+            f"{plan.meeting.date_str} {plan.meeting.time_str}"
+        )
+        if existing is None:
+            lines.append(f"{prefix} + create {target}")
+        elif existing.get("status") == "cancelled":
+            lines.append(f"{prefix} ! {target} was created and later deleted; will not recreate")
+        else:
+            lines.append(f"{prefix} = exists {existing.get('summary')}")
+
+    if plan.callback:
+        lines.append(
+            f"{prefix} + callback {plan.callback.caller_name} ({plan.callback.caller_phone}) "
+            f"at {plan.callback.due_at.isoformat()}"
+        )
+    return lines
+
+
+async def run_batch(
+    plans: list[Plan], dry_run: bool, concurrency: int
+) -> tuple[list[Plan], list[Plan]]:
+    """Apply (or diff) a batch. Returns the plans that failed and those skipped."""
+    # Same-caller records stay in file order; different callers run in parallel
+    chains: dict[str, list[Plan]] = {}
+    for plan in plans:
+        chains.setdefault(plan.caller_key, []).append(plan)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    output: dict[int, list[str]] = {}
+    failed: list[Plan] = []
+    skipped: list[Plan] = []
+
+    async def run_chain(chain: list[Plan]) -> None:
+        async with semaphore:
+            for plan in chain:
+                if plan.skipped:
+                    skipped.append(plan)
+                if dry_run:
+                    output[plan.line] = await diff_plan(plan)
+                    continue
+                if plan.error:
+                    logger.error(f"Line {plan.line}: {plan.error}")
+                    failed.append(plan)
+                    continue
+                if plan.skipped:
+                    logger.info(f"Line {plan.line} ({plan.call_id}) skipped: {plan.skipped}")
+                    continue
+                if not plan.actionable:
+                    continue
+                try:
+                    await apply_plan(plan)
+                except Exception as e:
+                    # The handler already logged the details
+                    failed.append(plan._replace(error=f"{type(e).__name__}: {e}"))
+
+    await asyncio.gather(*(run_chain(chain) for chain in chains.values()))
+
+    for line_no in sorted(output):
+        for text in output[line_no]:
+            print(text)
+    return failed, skipped
+
+
+def _read_batches(path: str, start_line: int, batch_size: int) -> Iterator[list[tuple[int, str]]]:
+    """Stream (line number, text) batches, skipping blank lines and already-processed lines."""
+    with open(path, encoding="utf-8") as f:
+        numbered = (
+            (line_no, line)
+            for line_no, line in enumerate(f, start=1)
+            if line_no > start_line and line.strip()
+        )
+        while batch := list(islice(numbered, batch_size)):
+            yield batch
+
+
+def _load_checkpoint(path: str, source: str) -> int:
+    if not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("source") != os.path.abspath(source):
+        raise SystemExit(f"Checkpoint {path} belongs to {checkpoint.get('source')}; use --restart")
+    return checkpoint["line"]
+
+
+def _save_checkpoint(path: str, source: str, line: int, totals: dict[str, int]) -> None:
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"source": os.path.abspath(source), "line": line, **totals}, f)
+    os.replace(tmp_path, path)
+
+
+async def backfill(args) -> None:
+    checkpoint_path = args.checkpoint or args.export + ".checkpoint"
+    failures_path = args.export + ".failed.jsonl"
+    if args.restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    start_line = 0 if args.dry_run else _load_checkpoint(checkpoint_path, args.export)
+    if start_line:
+        logger.info(f"Resuming {args.export} after line {start_line}")
+
+    totals = {"processed": 0, "failed": 0, "skipped": 0}
+    callback_max_age = timedelta(hours=args.callback_max_age_hours)
+    batches = _read_batches(args.export, start_line, args.batch_size)
+    loop = asyncio.get_running_loop()
+
+    processes = args.processes or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+
+        def extract(batch) -> Optional[asyncio.Future]:
+            """Split a batch into one chunk per process; results come back in line order."""
+            if not batch:
+                return None
+            chunk_size = -(-len(batch) // processes)
+            return asyncio.gather(
+                *(
+                    loop.run_in_executor(pool, _plan_batch, batch[i : i + chunk_size])
+                    for i in range(0, len(batch), chunk_size)
+                )
+            )
+
+        # Extract the next batch while the current one is being applied
+        pending = extract(next(batches, None))
+        while pending is not None:
+            plans = [
+                gate_plan(plan, args.replay_cancels, callback_max_age)
+                for chunk in await pending
+                for plan in chunk
+            ]
+            pending = extract(next(batches, None))
+
+            failed, skipped = await run_batch(plans, args.dry_run, args.concurrency)
+            totals["processed"] += len(plans)
+            totals["failed"] += len(failed)
+            totals["skipped"] += len(skipped)
+
+            if args.dry_run:
+                continue
+            if failed:
+                with open(failures_path, "a") as f:
+                    for plan in failed:
+                        f.write(json.dumps({"line": plan.line, "call_id": plan.call_id, "error": plan.error}) + "\n")
+            _save_checkpoint(checkpoint_path, args.export, plans[-1].line, totals)
+            logger.info(
+                f"Through line {plans[-1].line}: {totals['processed']} records, "
+                f"{totals['failed']} failed, {totals['skipped']} skipped"
+            )
+
+    logger.info(
+        f"Backfill finished: {totals['processed']} records, {totals['failed']} failed, "
+        f"{totals['skipped']} skipped"
+    )
+    if totals["failed"] and not args.dry_run:
+        logger.info(f"Failed records listed in {failures_path}")
+
+
+def _plan_batch(batch: list[tuple[int, str]]) -> list[Plan]:
+    return [plan_line(item) for item in batch]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill calendar changes from exported Retell calls")
+    parser.add_argument("export", help="JSONL export of Retell calls or call_analyzed payloads")
+    parser.add_argument("--dry-run", action="store_true", help="Print a diff against the calendar; change nothing")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(), help="Extraction processes")
+    parser.add_argument("--concurrency", type=int, default=4, help="Callers applied to the calendar at once")
+    parser.add_argument("--batch-size", type=int, default=100, help="Records per batch/checkpoint")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <export>.checkpoint)")
+    parser.add_argument("--restart", action="store_true", help="Ignore any checkpoint and start over")
+    parser.add_argument(
+        "--replay-cancels",
+        action="store_true",
+        help="Apply historical cancels and reschedules (default: report them only)",
+    )
+    parser.add_argument(
+        "--callback-max-age-hours",
+        type=float,
+        default=24,
+        help="Schedule callbacks only for calls that ended this recently (0 = none)",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    asyncio.run(backfill(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Benchmark Google Calendar payload size and latency: legacy requests vs the
+partial-response / bounded-window requests used by the app.
+
+Both sides are sent with the client library's default headers, which already
+negotiate gzip, so the savings shown come from the field masks and the
+search window alone.
+
+Runs against the live calendar configured in .env. Each round inserts a
+temporary event and searches the calendar both ways; all benchmark events
+are deleted at the end.
+
+Usage: PYTHONPATH=. python tools/bench_calendar_io.py [--rounds 5] [--query "Discovery Meeting"]
+"""
+
+import argparse
+import gzip
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from app.config import settings
+from app.services.google_calendar import (
+    HST_TIMEZONE,
+    INSERT_FIELDS,
+    SEARCH_FIELDS,
+    SEARCH_MAX_RESULTS,
+    _get_calendar_service,
+)
+
+
+def _send(request) -> tuple[int, int, float]:
+    """Send a request and return (decoded bytes, estimated wire bytes, latency ms).
+
+    httplib2 transparently decompresses responses, so the wire size of a
+    gzipped response is estimated by re-compressing the body.
+    """
+    start = time.perf_counter()
+    resp, content = request.http.request(
+        request.uri, method=request.method, body=request.body, headers=request.headers
+    )
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if resp.status >= 400:
+        raise RuntimeError(f"HTTP {resp.status}: {content[:200]!r}")
+    decoded = len(content)
+    wire = len(gzip.compress(content)) if "-content-encoding" in resp else decoded
+    return decoded, wire, elapsed_ms
+
+
+def _report(label: str, legacy: list[tuple], optimized: list[tuple]) -> None:
+    def summarize(samples):
+        return (
+            statistics.mean(s[0] for s in samples),
+            statistics.mean(s[1] for s in samples),
+            statistics.median(s[2] for s in samples),
+        )
+
+    l_dec, l_wire, l_ms = summarize(legacy)
+    o_dec, o_wire, o_ms = summarize(optimized)
+    print(f"\n{label}")
+    print(f"  {'':<10}{'decoded B':>12}{'wire B':>12}{'p50 ms':>10}")
+    print(f"  {'legacy':<10}{l_dec:>12.0f}{l_wire:>12.0f}{l_ms:>10.1f}")
+    print(f"  {'optimized':<10}{o_dec:>12.0f}{o_wire:>12.0f}{o_ms:>10.1f}")
+    saved_dec = (1 - o_dec / l_dec) * 100 if l_dec else 0.0
+    saved_wire = (1 - o_wire / l_wire) * 100 if l_wire else 0.0
+    print(
+        f"  saved: {l_dec - o_dec:.0f} decoded bytes ({saved_dec:.1f}%), "
+        f"{l_wire - o_wire:.0f} wire bytes ({saved_wire:.1f}%), {l_ms - o_ms:.1f} ms p50"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Calendar request payloads")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--query", default="Discovery Meeting")
+    args = parser.parse_args()
+
+    service = _get_calendar_service()
+    events = service.events()
+    calendar_id = settings.google_calendar_id
+
+    tomorrow = datetime.now() + timedelta(days=1)
+    event_body = {
+        "summary": "BENCH - Post Call Processor I/O",
+        "description": "Temporary benchmark event. Deleted automatically.\n" * 10,
+        "start": {
+            "dateTime": tomorrow.replace(hour=10, minute=0, second=0).strftime("%Y-%m-%dT%H:%M:%S"),
+            "timeZone": HST_TIMEZONE,
+        },
+        "end": {
+            "dateTime": tomorrow.replace(hour=11, minute=0, second=0).strftime("%Y-%m-%dT%H:%M:%S"),
+            "timeZone": HST_TIMEZONE,
+        },
+    }
+
+    now = datetime.utcnow()
+    time_min = now.isoformat() + "Z"
+    time_max = (now + timedelta(days=settings.calendar_search_window_days)).isoformat() + "Z"
+
+    insert_legacy, insert_optimized = [], []
+    list_legacy, list_optimized = [], []
+    deleted_ids = []
+
+    try:
+        for _ in range(args.rounds):
+            req = events.insert(calendarId=calendar_id, body=event_body)
+            insert_legacy.append(_send(req))
+            req = events.insert(calendarId=calendar_id, body=event_body, fields=INSERT_FIELDS)
+            insert_optimized.append(_send(req))
+
+            req = events.list(
+                calendarId=calendar_id,
+                timeMin=time_min,
+                maxResults=SEARCH_MAX_RESULTS,
+                singleEvents=True,
+                orderBy="startTime",
+                q=args.query,
+            )
+            list_legacy.append(_send(req))
+            req = events.list(
+                calendarId=calendar_id,
+                timeMin=time_min,
+                timeMax=time_max,
+                maxResults=SEARCH_MAX_RESULTS,
+                singleEvents=True,
+                orderBy="startTime",
+                q=args.query,
+                fields=SEARCH_FIELDS,
+            )
+            list_optimized.append(_send(req))
+    finally:
+        # Clean up every benchmark event, however the run ended
+        for item in (
+            events.list(
+                calendarId=calendar_id,
+                timeMin=time_min,
+                q="BENCH - Post Call Processor I/O",
+                fields="items(id)",
+            )
+            .execute()
+            .get("items", [])
+        ):
+            events.delete(calendarId=calendar_id, eventId=item["id"]).execute()
+            deleted_ids.append(item["id"])
+
+    print(f"Calendar: {calendar_id}  rounds: {args.rounds}  query: {args.query!r}")
+    _report("events.insert", insert_legacy, insert_optimized)
+    _report("events.list", list_legacy, list_optimized)
+    print(f"\nCleaned up {len(deleted_ids)} benchmark events.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark the transcript outcome classifier on large synthetic transcripts.
+Scan time should grow linearly with transcript size.
+
+Usage: PYTHONPATH=. python tools/bench_outcome_classifier.py [--sizes-mb 1 2 4 8] [--repeat 3]
+"""
+
+import argparse
+import time
+
+from app.models import CallData
+from app.services.outcome_classifier import classify_outcome
+
+FILLER_LINES = [
+    "Agent: Hello, this is Marina with Invisible Arts. How can I help you today?",
+    "User: Hi, I had a question about your branding packages and pricing.",
+    "Agent: Of course. We cover web design, branding, and digital strategy.",
+    "User: Okay, and how long does a typical website project take?",
+    "Agent: Most projects run six to ten weeks depending on scope.",
+]
+SIGNAL_LINES = [
+    "User: Actually, I need to reschedule my meeting to a different day.",
+    "Agent: No problem, I can move it to Thursday at 1 PM. You're all set.",
+]
+
+
+def _transcript(size_bytes: int) -> str:
+    """Filler conversation with reschedule signals at the end, padded to ``size_bytes``."""
+    block = "\n".join(FILLER_LINES) + "\n"
+    body = block * (size_bytes // len(block) + 1)
+    return body[:size_bytes] + "\n" + "\n".join(SIGNAL_LINES)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the outcome classifier")
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'size MB':>8}{'best ms':>10}{'MB/s':>8}{'ns/char':>9}  outcome (confidence)")
+    for size_mb in args.sizes_mb:
+        transcript = _transcript(int(size_mb * 1024 * 1024))
+        call = CallData(
+            call_id="bench",
+            transcript=transcript,
+            transcript_with_tool_calls=[
+                {"role": "tool_call_invocation", "name": "check_available_dates", "arguments": "{}"}
+            ],
+        )
+
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = classify_outcome(call)
+            best = min(best, time.perf_counter() - start)
+
+        print(
+            f"{size_mb:>8.1f}{best * 1000:>10.1f}{len(transcript) / best / 1e6:>8.1f}"
+            f"{best * 1e9 / len(transcript):>9.1f}  "
+            f"{result.outcome.value if result.outcome else None} ({result.confidence})"
+        )
+
+
+if __name__ == "__main__":
+    main()